@@ -71,16 +71,21 @@ class Response:
     .. note::
         For endpoints that return a JSON array, such as :func:`brawlhalla.BrawlhallaClient.get_ranked_page`, you will 
         have to access the data from ``response_object.responses``, which will be a ``list`` of ``Response`` objects.
+
+    .. note::
+        When responses are decoded in :attr:`ClientOptions.executor`, lists of objects are only turned into lists of
+        ``Response`` objects the first time they are accessed, through an attribute or ``response_object[key]``.
+        Until then, they are missing from ``vars(response_object)`` (and ``response_object.__dict__``).
     """
+    #  Lists that are still in compact form (see _compact), in a slot so that __dict__ only has the API's attributes.
+    __slots__ = ("__dict__", "__lazy")
+
     def __init__(self, data):
+        self.__lazy = None
         if type(data) is list:
             self.responses = [Response(x) for x in data]
         elif type(data) is dict:
-            #  Fix emojis in name
-            if "name" in data.keys():
-                data["name"] = data["name"].encode("raw_unicode_escape").decode("utf-8")
-            elif "teamname" in data.keys():
-                data["teamname"] = data["teamname"].encode("raw_unicode_escape").decode("utf-8")
+            _fix_names(data)
 
             for key in data:
                 if type(data[key]) is list:
@@ -90,10 +95,106 @@ class Response:
         else:
             raise NotImplementedError(f"Unsupported data type: {type(data)}")
 
+    @classmethod
+    def _from_compact(cls, data):
+        """
+        Creates a response from data returned by :func:`_compact`. Lists of objects are only turned into lists of
+        ``Response`` objects the first time they are accessed.
+        """
+        if type(data) is list:
+            return Response(data)
+
+        response = cls.__new__(cls)
+        if type(data) is tuple:
+            response.__lazy = {"responses": data}
+            return response
+
+        lazy = dict((key, value) for key, value in data.items() if type(value) is tuple)
+        for key in lazy:
+            del data[key]
+        for key in data:
+            if type(data[key]) is list:
+                data[key] = [Response(x) for x in data[key]]
+
+        response.__lazy = lazy or None
+        response.__dict__ = data
+        return response
+
+    def __getattr__(self, item):
+        #  Only called for attributes that aren't set, i.e. lists that are still in compact form. The slot itself
+        #  isn't set yet while a response is being unpickled or copied, object.__getattribute__ doesn't recurse then.
+        try:
+            lazy = object.__getattribute__(self, "_Response__lazy")
+        except AttributeError:
+            lazy = None
+        if not lazy or item not in lazy:
+            raise AttributeError(item)
+
+        keys, rows, nested = lazy.pop(item)
+        if not lazy:
+            self.__lazy = None
+
+        rows = [dict(zip(keys, row)) for row in rows] if keys is not None else rows
+        if nested:
+            value = [Response._from_compact(row) for row in rows]
+        else:
+            #  Nothing left to unpack, skip looking through every value of every row.
+            value = []
+            for row in rows:
+                response = Response.__new__(Response)
+                response.__lazy = None
+                response.__dict__ = row
+                value.append(response)
+
+        self.__dict__[item] = value
+        return value
+
     def __getitem__(self, item):
+        if self.__lazy and item in self.__lazy:
+            return getattr(self, item)
         return self.__dict__[item]
 
 
+def _fix_names(data: dict):
+    #  Fix emojis in name
+    if "name" in data.keys():
+        data["name"] = data["name"].encode("raw_unicode_escape").decode("utf-8")
+    elif "teamname" in data.keys():
+        data["teamname"] = data["teamname"].encode("raw_unicode_escape").decode("utf-8")
+
+
+def _compact(data):
+    """
+    Does the work of :class:`Response` on decoded JSON without creating any ``Response`` object, and packs every list
+    of objects as a ``(keys, rows, nested)`` tuple, with one tuple of values per object, and whether any of the values
+    are lists themselves. The result is cheap to send between processes, and is turned into a response with
+    :func:`Response._from_compact`.
+    """
+    if type(data) is list:
+        return _compact_rows(data)
+
+    _fix_names(data)
+    for key in data:
+        if type(data[key]) is list:
+            data[key] = _compact_rows(data[key])
+    return data
+
+
+def _compact_rows(rows: list):
+    #  Lists of anything but objects are left as they are, Response handles them when it is created.
+    if not all(type(row) is dict for row in rows):
+        return rows
+
+    rows = [_compact(row) for row in rows]
+    nested = any(type(value) in (tuple, list) for row in rows for value in row.values())
+    keys = tuple(rows[0]) if rows else ()
+    if all(tuple(row) == keys for row in rows):
+        return keys, [tuple(row.values()) for row in rows], nested
+
+    #  Objects with different keys keep their own.
+    return None, rows, nested
+
+
 class BrawlhallaPyException(Exception):
     """
     An exception that signifies something went wrong when sending a request.
@@ -1,10 +1,88 @@
 import asyncio
+import functools
+import json
 import aiohttp
 import async_timeout
 
+from concurrent.futures import Executor
 from datetime import datetime
 from brawlhalla.RateBucket import RateBucket
-from brawlhalla.API import BrawlhallaPyException, Response, Legends
+from brawlhalla.API import BrawlhallaPyException, Response, Legends, _compact
+
+
+#  Post processing for each endpoint, done on the decoded JSON before it is turned into a Response. These are module
+#  level functions so they can be sent to a process pool, see ClientOptions.executor.
+
+def _process_ranked_page(data: list):
+    #  Convert the string "rank" attribute into an integer.
+    for entry in data:
+        entry["rank"] = int(entry["rank"])
+
+
+def _process_player_stats(data: dict):
+    # Convert string values from the API into integer values.
+    for key in ["damagebomb", "damagemine", "damagespikeball", "damagesidekick"]:
+        data[key] = int(data[key])
+
+    keys = ["damagedealt", "damagetaken", "damageunarmed", "damagethrownitem", "damageweaponone",
+            "damageweapontwo", "damagegadgets"]
+    for legend in data["legends"]:
+        for key in keys:
+            legend[key] = int(legend[key])
+
+    data["clan"]["clan_xp"] = int(data["clan"]["clan_xp"])
+
+
+def _process_player_ranked_stats(data: dict):
+    #  For this endpoint only, region is returned as an integer.
+    ints_to_regions = dict([(2, "US-E"), (3, "EU"), (4, "SEA"), (5, "BRZ"), (6, "AUS"), (7, "US-W")])
+    for team in data["2v2"]:
+        team["region"] = ints_to_regions[team["region"]]
+
+
+def _process_clan(data: dict):
+    data["clan_create_date"] = datetime.fromtimestamp(data["clan_create_date"])
+    for member in data["clan"]:
+        member["join_date"] = datetime.fromtimestamp(member["join_date"])
+
+
+def _process_legend_info(data: dict):
+    for key in ["strength", "dexterity", "defense", "speed"]:
+        data[key] = int(data[key])
+
+
+def _decode_response(data: bytes, postprocess=None):
+    data = json.loads(data)
+    if postprocess:
+        postprocess(data)
+    return data
+
+
+def _decode_batch(batch: list) -> list:
+    #  Runs in the executor. Errors are sent back to the request they belong to instead of failing the whole batch.
+    results = []
+    for data, postprocess in batch:
+        try:
+            results.append(_compact(_decode_response(data, postprocess)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _resolve_batch(futures: list, job: asyncio.Future):
+    for i, future in enumerate(futures):
+        #  The request may have timed out or been cancelled while it was being decoded.
+        if future.done():
+            continue
+
+        if job.cancelled():
+            future.cancel()
+        elif job.exception():
+            future.set_exception(job.exception())
+        elif isinstance(job.result()[i], Exception):
+            future.set_exception(job.result()[i])
+        else:
+            future.set_result(job.result()[i])
 
 
 class ClientOptions:
@@ -22,12 +100,26 @@ class ClientOptions:
         until it can make more requests. Default value is True.
 
     max_timeout_time : int
-        Max amount of time to wait (in seconds) for a request, default value is None. If the connection timeout is hit, 
-        the corooutine will return None. Set to None to specify no timeout.
+        Max amount of time to wait (in seconds) for a request, default value is None. The deadline covers the time 
+        spent waiting on the internal ratelimiter, the HTTP request and decoding the response. If the deadline is hit, 
+        or the ratelimiter can't let the request through before it, the coroutine will return None. Set to None to 
+        specify no timeout. Every method of the :class:`BrawlhallaClient` also takes a ``timeout`` argument to 
+        override this value for a single call.
+        
+        .. note::
+            A request cancelled while waiting on the internal ratelimiter, or left with less than 
+            :attr:`ClientOptions.min_request_time` once it is through, gives its token back. Once the request has 
+            been sent, its token is kept even if it times out, since the API will have counted it.
+        
+    min_request_time : float
+        The least amount of time (in seconds) that must be left before the deadline for a request to be sent, default 
+        value is 0.1. Requests that can't get through the internal ratelimiter with this much time left return None 
+        without being sent.
         
     propagate_exceptions : bool
         If True, exceptions will be propagated to the caller, :attr:`ClientOptions.swallow_429` overrides this setting. 
-        If set to false, errors will return None instead of raising an exception. Default value is True.
+        If set to false, errors will return None instead of raising an exception. Default value is True. This includes 
+        errors while decoding and post processing a response.
         
     swallows_429 : bool
         If True, rate limit exceptions will not be propagated to the caller, instead, None will be returned. Default 
@@ -40,16 +132,32 @@ class ClientOptions:
     retry_delay : int
         The amount of time (in seconds) to wait before retrying a rate limited request. Default value is 60.
         
+    executor : concurrent.futures.Executor
+        If set, JSON decoding and post processing of responses are run in this executor instead of the event loop, 
+        default value is None. A ``ProcessPoolExecutor`` spreads the decoding of bulk requests (e.g. thousands of 
+        concurrent :func:`BrawlhallaClient.get_player_stats`) across cores, so the event loop stays free for network 
+        I/O. Responses received during the same iteration of the event loop are sent to the executor together, in 
+        batches of up to :attr:`ClientOptions.executor_batch_size`. The executor sends back plain tuples instead of 
+        :class:`API.Response` objects, and lists of objects (e.g. ``legends``) only become ``Response`` objects the 
+        first time they are accessed.
+        
+    executor_batch_size : int
+        The maximum number of responses decoded by a single job of :attr:`ClientOptions.executor`, default value 
+        is 32.
+        
     """
 
     requests_per_15_minutes: int = 180
     requests_per_second: int = 10
     use_internal_ratelimiter: bool = True
     max_timeout_time: int = None
+    min_request_time: float = 0.1
     propagate_exceptions: bool = True
     swallow_429: bool = True
     retry_on_429: bool = False
     retry_delay = 60
+    executor: Executor = None
+    executor_batch_size: int = 32
 
 
 class BrawlhallaClient:
@@ -61,9 +169,13 @@ class BrawlhallaClient:
     The client has a built-in ratelimiter to prevent you from going over your maximum allotted requests. If you have 
     an elevated ratelimit, you can pass those to the client in the :class:`ClientOptions`.
     
+    An existing ``aiohttp.ClientSession`` may be passed as ``session`` to share its connection pool with other 
+    clients. The client will only close sessions that it created itself.
+    
     """
 
-    def __init__(self, api_key: str, client_options: ClientOptions = ClientOptions()):
+    def __init__(self, api_key: str, client_options: ClientOptions = ClientOptions(),
+                 session: aiohttp.ClientSession = None):
         self.api_key = api_key
         self.options = client_options
 
@@ -72,10 +184,14 @@ class BrawlhallaClient:
         else:
             self.bucket = None
 
-        self.session = aiohttp.ClientSession()
+        self.__owns_session = session is None
+        self.session = session or aiohttp.ClientSession()
+
+        self.__pending_decodes = []
 
     def __del__(self):
-        self.session.close()
+        if self.__owns_session:
+            self.session.close()
 
     def __resolve_query_params(self, **kvargs) -> str:
         query_params = ""
@@ -91,38 +207,98 @@ class BrawlhallaClient:
     def __resolve_endpoint(self, endpoint: str, *args, **kvargs) -> str:
         return f"https://api.brawlhalla.com/{endpoint.format(*args)}/{self.__resolve_query_params(**kvargs)}"
 
-    async def __send_request(self, endpoint, *args, **kvargs):
-        if self.options.use_internal_ratelimiter:
-            while not self.bucket.can_request():
-                await asyncio.sleep(self.bucket.get_next_request())
-            self.bucket.do_request()
+    @staticmethod
+    def __time_left(deadline):
+        if deadline is None:
+            return None
+        return max(0, deadline - asyncio.get_event_loop().time())
+
+    async def __acquire_token(self, deadline) -> bool:
+        if not self.options.use_internal_ratelimiter:
+            return True
+
+        #  Fail fast if the requests already queued in the bucket won't let us go early enough to send the request
+        #  before the deadline.
+        if deadline is not None and \
+                self.bucket.get_next_request() + self.options.min_request_time > self.__time_left(deadline):
+            return False
+
+        delay = self.bucket.reserve_request()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                #  The request was never sent, give the token back to the requests queued behind us.
+                self.bucket.refund_request()
+                raise
+
+        #  The wait can overshoot, don't spend the token on a request that would time out before being sent.
+        if deadline is not None and self.__time_left(deadline) < self.options.min_request_time:
+            self.bucket.refund_request()
+            return False
+        return True
+
+    async def __decode_response(self, response, postprocess) -> Response:
+        data = await response.read()
+        if self.options.executor is None:
+            return Response(_decode_response(data, postprocess))
+
+        #  Responses received during the same iteration of the event loop are sent to the executor together.
+        loop = asyncio.get_event_loop()
+        if not self.__pending_decodes:
+            loop.call_soon(self.__submit_decodes)
+
+        future = loop.create_future()
+        self.__pending_decodes.append((data, postprocess, future))
+        return Response._from_compact(await future)
+
+    def __submit_decodes(self):
+        loop = asyncio.get_event_loop()
+        pending, self.__pending_decodes = self.__pending_decodes, []
+
+        size = self.options.executor_batch_size
+        for i in range(0, len(pending), size):
+            batch = pending[i:i + size]
+            job = loop.run_in_executor(self.options.executor, _decode_batch,
+                                       [(data, postprocess) for data, postprocess, _ in batch])
+            job.add_done_callback(functools.partial(_resolve_batch, [future for _, _, future in batch]))
+
+    async def __send_request(self, endpoint, *args, timeout=None, postprocess=None, **kvargs):
+        if timeout is None:
+            timeout = self.options.max_timeout_time
+        deadline = None if timeout is None else asyncio.get_event_loop().time() + timeout
 
         endpoint = self.__resolve_endpoint(endpoint, *args, **kvargs)
 
         try:
-            with async_timeout.timeout(self.options.max_timeout_time):
-                async with self.session.get(endpoint) as response:
-                    if response.status == 200:
-                        return Response(await response.json())
-
-                    elif response.status == 429:
-                        if self.options.swallow_429:
-                            if self.options.retry_on_429:
-                                await asyncio.sleep(self.options.retry_delay)
-                                return await self.__send_request(endpoint, *args, **kvargs)
-                            else:
-                                print("A")
+            while True:
+                if not await self.__acquire_token(deadline):
+                    return None
+
+                async with async_timeout.timeout(self.__time_left(deadline)):
+                    async with self.session.get(endpoint) as response:
+                        if response.status == 200:
+                            return await self.__decode_response(response, postprocess)
+
+                        elif response.status == 429:
+                            if not self.options.swallow_429:
+                                raise BrawlhallaPyException(429, "Too Many Requests",
+                                                            "Your API key has hit the rate limit.")
+                            if not self.options.retry_on_429:
                                 return None
 
-                        raise BrawlhallaPyException(429, "Too Many Requests", "Your API key has hit the rate limit.")
+                        else:
+                            data = await response.json()
+                            detailed_error = "No further details."
+                            if data:
+                                detailed_error = data["error"]["message"]
 
-                    else:
-                        data = await response.json()
-                        detailed_error = "No further details."
-                        if data:
-                            detailed_error = data["error"]["message"]
+                            raise BrawlhallaPyException(response.status, response.reason, detailed_error)
 
-                        raise BrawlhallaPyException(response.status, response.reason, detailed_error)
+                #  We were rate limited, only retry if the retry can finish before the deadline.
+                if deadline is not None and self.options.retry_delay >= self.__time_left(deadline):
+                    return None
+                await asyncio.sleep(self.options.retry_delay)
         except asyncio.TimeoutError:
             return None
         except Exception as e:
@@ -132,21 +308,24 @@ class BrawlhallaClient:
             else:
                 return None
 
-    async def get_player_from_steam_id(self, steam_id: int):
+    async def get_player_from_steam_id(self, steam_id: int, timeout: float = None):
         """
         Sends a request to get a player's Brawlhalla ID from a Steam ID.
         
         :param int steam_id:
             The Steam ID of the player to get the Brawlhalla ID for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object with the attributes ``brawlhalla_id`` and ``name``, or ``None`` if the 
             request timed out.
         :raises API.BrawlhallaPyException:
             if something went wrong with the request.
         """
-        return await self.__send_request("search", steamid=steam_id)
+        return await self.__send_request("search", steamid=steam_id, timeout=timeout)
 
-    async def get_ranked_page(self, bracket, region, page=1, name=None):
+    async def get_ranked_page(self, bracket, region, page=1, name=None, timeout: float = None):
         """
         Sends a request to get a ranked page.
         
@@ -158,6 +337,9 @@ class BrawlhallaClient:
             The page number to get, minimum (and default) value is 1.
         :param str name: 
             The (optional) name to search for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A ``list`` of :class:`API.Response` objects, each with the following attributes: 
             
@@ -189,21 +371,18 @@ class BrawlhallaClient:
             if something went wrong with the request.
         """
 
-        responses = await self.__send_request("rankings/{}/{}/{}", bracket, region, page, name=name)
-
-        #  Post processing, convert the string "rank" attribute into an integer.
-        if responses:
-            for response in responses.responses:
-                response.rank = int(response.rank)
+        return await self.__send_request("rankings/{}/{}/{}", bracket, region, page, name=name, timeout=timeout,
+                                         postprocess=_process_ranked_page)
 
-        return responses
-
-    async def get_player_stats(self, brawlhalla_id: int):
+    async def get_player_stats(self, brawlhalla_id: int, timeout: float = None):
         """
         Sends a request to get general stats for a player. All values are total from season 2 and onwards.
         
         :param int brawlhalla_id: 
             The Brawlhalla ID of the player to get information for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object of the player, with the following attributes: ``brawlhalla_id`` (int), 
             ``name`` (str), ``xp`` (int), ``level`` (int), ``xp_percentage`` (int), ``games`` (int), 
@@ -231,31 +410,18 @@ class BrawlhallaClient:
             In all the percentage attributes (e.g. ``xp_percentage``), the value is represented as a decimal < 0, 
             e.g. ``0.84918519``.
         """
-        response = await self.__send_request("player/{}/stats", brawlhalla_id)
-
-        if response:
-            # Convert string values from the API into integer values.
-            response.damagebomb = int(response.damagebomb)
-            response.damagemine = int(response.damagemine)
-            response.damagespikeball = int(response.damagespikeball)
-            response.damagesidekick = int(response.damagesidekick)
+        return await self.__send_request("player/{}/stats", brawlhalla_id, timeout=timeout,
+                                         postprocess=_process_player_stats)
 
-            keys = ["damagedealt", "damagetaken", "damageunarmed", "damagethrownitem", "damageweaponone",
-                    "damageweapontwo", "damagegadgets"]
-            for legend in response.legends:
-                for key in keys:
-                    legend[key] = int(legend[key])
-
-            response.clan["clan_xp"] = int(response.clan["clan_xp"])
-
-        return response
-
-    async def get_player_ranked_stats(self, brawlhalla_id: int):
+    async def get_player_ranked_stats(self, brawlhalla_id: int, timeout: float = None):
         """
         Sends a request to get the ranked stats of a player for the current season.
         
         :param int brawlhalla_id: 
             The Brawlhalla ID of the player to get information for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object with the following attributes: ``name`` (str), ``brawlhalla_id`` (int), 
             ``rating`` (int), ``peak_rating`` (int), ``tier`` (str, see the :ref:`Notes` section), ``wins`` (int), 
@@ -288,22 +454,18 @@ class BrawlhallaClient:
             Currently, the Brawlhalla API always returns ``global_rank`` and ``region_rank`` as 0. This may be fixed 
             in the future.
         """
-        response = await self.__send_request("player/{}/ranked", brawlhalla_id)
-
-        if response:
-            #  For this endpoint only, region is returned as an integer.
-            ints_to_regions = dict([(2, "US-E"), (3, "EU"), (4, "SEA"), (5, "BRZ"), (6, "AUS"), (7, "US-W")])
-            for team in response["2v2"]:
-                team.region = ints_to_regions[team.region]
+        return await self.__send_request("player/{}/ranked", brawlhalla_id, timeout=timeout,
+                                         postprocess=_process_player_ranked_stats)
 
-        return response
-
-    async def get_clan(self, clan_id: int):
+    async def get_clan(self, clan_id: int, timeout: float = None):
         """
         Sends a request to get information for a clan.
         
         :param int clan_id: 
             The clan ID to get information for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object with the following attributes: ``clan_id`` (int), ``clan_name`` (str), 
             ``clan_create_date`` (datetime), ``clan_xp`` (int), and ``clan`` (``list`` of objects, see below).                
@@ -320,21 +482,17 @@ class BrawlhallaClient:
              UTC format.
 
         """
-        response = await self.__send_request("clan/{}", clan_id)
-
-        if response:
-            response.clan_create_date = datetime.fromtimestamp(response.clan_create_date)
-            for member in response.clan:
-                member.join_date = datetime.fromtimestamp(member.join_date)
-
-        return response
+        return await self.__send_request("clan/{}", clan_id, timeout=timeout, postprocess=_process_clan)
 
-    async def get_legend_info(self, legend: Legends):
+    async def get_legend_info(self, legend: Legends, timeout: float = None):
         """
         Sends a request to get static information for a legend.
         
         :param Legends legend: 
             An enum value from :class:`API.Legends`.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object containing legend information.
         :raises API.BrawlhallaPyException:
@@ -344,14 +502,17 @@ class BrawlhallaClient:
             This method serves as a wrapper for the other method with the same name, except it takes an enum value 
             instead of an integer value. See the other method for more details.
         """
-        return await self.get_legend_info(legend.value)
+        return await self.get_legend_info(legend.value, timeout)
 
-    async def get_legend_info(self, legend: int):
+    async def get_legend_info(self, legend: int, timeout: float = None):
         """
         Sends a request to get static information for a legend.
         
         :param int legend:
             The ID of the legend to get information for.
+        :param float timeout:
+            The (optional) max amount of time (in seconds) for this call, overrides 
+            :attr:`ClientOptions.max_timeout_time`.
         :return: 
             A :class:`API.Response` object with the following attributes:
                 
@@ -396,12 +557,91 @@ class BrawlhallaClient:
             ``Fists``, or ``Scythe``
         """
 
-        response = await self.__send_request("legend/{}", legend)
+        return await self.__send_request("legend/{}", legend, timeout=timeout, postprocess=_process_legend_info)
+
+
+class BrawlhallaClientPool:
+    """
+    Distributes requests across multiple API keys, each with its own ratelimiter, so throughput scales with the 
+    number of keys. Every request is routed to the key whose ratelimiter can let a request through the soonest. All 
+    keys share a single ``aiohttp.ClientSession``. For example, 
+    ``pool = BrawlhallaClientPool([key_one, key_two], client_options: opts)``.
+    
+    Each item of ``api_keys`` is either an API key, which uses ``client_options``, or an ``(api_key, ClientOptions)`` 
+    tuple for keys with their own ratelimit. For example, 
+    ``pool = BrawlhallaClientPool([key_one, (elevated_key, elevated_opts)])``.
+    
+    The pool has the same methods as the :class:`BrawlhallaClient`, see the client for details on each of them.
+    
+    .. note::
+        The pool owns its session, call ``await pool.close()`` once you are done with it.
+    
+    .. note::
+        Keys without :attr:`ClientOptions.use_internal_ratelimiter` are always considered available. Keys that are 
+        equally available are used round robin.
+    """
+
+    def __init__(self, api_keys: list, client_options: ClientOptions = ClientOptions()):
+        if not api_keys:
+            raise ValueError("At least one API key is required.")
+
+        self.session = aiohttp.ClientSession()
+        self.clients = []
+        for api_key in api_keys:
+            if isinstance(api_key, tuple):
+                api_key, options = api_key
+            else:
+                options = client_options
+            self.clients.append(BrawlhallaClient(api_key, options, self.session))
+
+        self.__next_index = 0
+
+    async def close(self):
+        """
+        Closes the session shared by every key of the pool.
+        """
+        await self.session.close()
 
-        if response:
-            response.strength = int(response.strength)
-            response.dexterity = int(response.dexterity)
-            response.defense = int(response.defense)
-            response.speed = int(response.speed)
+    def __next_client(self) -> BrawlhallaClient:
+        #  Start looking from a different client every time, so ties are broken round robin.
+        clients = self.clients[self.__next_index:] + self.clients[:self.__next_index]
+        self.__next_index = (self.__next_index + 1) % len(self.clients)
 
-        return response
+        #  The chosen client reserves its token before its first await, so no other request can sneak in between.
+        return min(clients, key=lambda client: client.bucket.get_next_request() if client.bucket else 0)
+
+    async def get_player_from_steam_id(self, steam_id: int, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_player_from_steam_id`.
+        """
+        return await self.__next_client().get_player_from_steam_id(steam_id, timeout)
+
+    async def get_ranked_page(self, bracket, region, page=1, name=None, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_ranked_page`.
+        """
+        return await self.__next_client().get_ranked_page(bracket, region, page, name, timeout)
+
+    async def get_player_stats(self, brawlhalla_id: int, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_player_stats`.
+        """
+        return await self.__next_client().get_player_stats(brawlhalla_id, timeout)
+
+    async def get_player_ranked_stats(self, brawlhalla_id: int, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_player_ranked_stats`.
+        """
+        return await self.__next_client().get_player_ranked_stats(brawlhalla_id, timeout)
+
+    async def get_clan(self, clan_id: int, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_clan`.
+        """
+        return await self.__next_client().get_clan(clan_id, timeout)
+
+    async def get_legend_info(self, legend: int, timeout: float = None):
+        """
+        See :func:`BrawlhallaClient.get_legend_info`.
+        """
+        return await self.__next_client().get_legend_info(legend, timeout)
@@ -0,0 +1,173 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+"""
+This module contains the :class:`LadderExporter`, which streams ranked ladders to disk page by page.
+"""
+
+RANKED_PAGE_FIELDS = ["rank", "name", "brawlhalla_id", "best_legend", "best_legend_games", "best_legend_wins",
+                      "rating", "tier", "games", "wins", "region", "peak_rating"]
+RANKED_2V2_FIELDS = ["rank", "teamname", "brawlhalla_id_one", "brawlhalla_id_two", "rating", "tier", "games", "wins",
+                     "region", "peak_rating"]
+
+
+class LadderExporter:
+    """
+    Streams a ranked ladder from :func:`BrawlhallaClient.get_ranked_page` to a file. Each page is written out as it
+    arrives, so memory usage stays the same no matter how large the ladder is. For example,
+    ``await LadderExporter(client, "us-e_1v1.ndjson.gz", compress=True).export("1v1", "US-E")``.
+
+    client : BrawlhallaClient
+        The client used to request the ranked pages.
+
+    path : str
+        The file to write the ladder to.
+
+    file_format : str
+        One of ``ndjson`` (one JSON object per player), ``csv``, or ``columns`` (one JSON object per page, mapping
+        every field to the list of its values on that page). Default value is ``ndjson``.
+
+    compress : bool
+        If True, the file is gzip compressed. Default value is False.
+
+    buffer_size : int
+        Amount of encoded data (in bytes) to buffer before writing it to disk, default value is 1 MiB.
+
+    fields : list
+        The fields of each player (or team) to export, default value is every field returned by
+        :func:`BrawlhallaClient.get_ranked_page` for the exported bracket, i.e. ``Export.RANKED_PAGE_FIELDS`` for
+        ``1v1`` and ``Export.RANKED_2V2_FIELDS`` for ``2v2``.
+
+    .. note::
+        Progress is saved to ``{path}.progress`` every time the buffer is written to disk, and when a page can't be
+        requested. If an export is interrupted (crash, exception, or a page that couldn't be requested), calling
+        :func:`export` again with the same arguments and the same exporter settings resumes after the last page that
+        was written. Otherwise, the export starts over. The progress file is removed once the export is complete.
+    """
+
+    FORMATS = ("ndjson", "csv", "columns")
+
+    def __init__(self, client, path: str, file_format: str = "ndjson", compress: bool = False,
+                 buffer_size: int = 1 << 20, fields: list = None):
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+        self.client = client
+        self.path = path
+        self.file_format = file_format
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.fields = fields
+        self.progress_path = f"{path}.progress"
+
+    async def export(self, bracket: str, region: str, first_page: int = 1, last_page: int = None) -> bool:
+        """
+        Exports the ranked ladder of a bracket and region, see :func:`BrawlhallaClient.get_ranked_page` for the
+        accepted values.
+
+        :param str bracket:
+            The ranked bracket to export, one of ``1v1`` or ``2v2``.
+        :param str region:
+            The region to export.
+        :param int first_page:
+            The first page to export, default value is 1.
+        :param int last_page:
+            The (optional) last page to export. If None, pages are exported until the end of the ladder.
+        :return:
+            True if the export is complete, False if a page couldn't be requested (the client returned None). In
+            that case, the export can be resumed by calling this method again.
+        :raises API.BrawlhallaPyException:
+            if something went wrong with a request.
+        """
+        fields = list(self.fields or (RANKED_2V2_FIELDS if bracket == "2v2" else RANKED_PAGE_FIELDS))
+
+        #  Everything that changes the content of the file, a progress file is only resumed if all of it matches.
+        export = {"bracket": bracket, "region": region, "file_format": self.file_format, "compress": self.compress,
+                  "fields": fields, "first_page": first_page, "last_page": last_page}
+
+        progress = self.__load_progress(export)
+        if progress:
+            page, offset = progress["next_page"], progress["offset"]
+        else:
+            page, offset = first_page, 0
+
+        with open(self.path, "r+b" if offset else "wb") as f:
+            f.truncate(offset)
+            f.seek(offset)
+
+            buffer = bytearray()
+            if offset == 0 and self.file_format == "csv":
+                buffer += self.__encode_csv_rows(fields, [dict(zip(fields, fields))])
+
+            #  Whatever happens, write out the pages already requested so a rerun doesn't request them again.
+            try:
+                while last_page is None or page <= last_page:
+                    response = await self.client.get_ranked_page(bracket, region, page)
+                    if response is None:
+                        return False
+
+                    if not response.responses:
+                        break
+
+                    buffer += self.__encode_page(fields, response.responses)
+                    page += 1
+
+                    if len(buffer) >= self.buffer_size:
+                        self.__flush(f, buffer, export, page)
+            finally:
+                self.__flush(f, buffer, export, page)
+
+        os.remove(self.progress_path)
+        return True
+
+    def __encode_page(self, fields: list, entries) -> bytes:
+        rows = [dict((field, getattr(entry, field, None)) for field in fields) for entry in entries]
+
+        if self.file_format == "ndjson":
+            return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+        elif self.file_format == "csv":
+            return self.__encode_csv_rows(fields, rows)
+        else:
+            columns = dict((field, [row[field] for row in rows]) for field in fields)
+            return (json.dumps(columns, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def __encode_csv_rows(fields: list, rows) -> bytes:
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fields, extrasaction="ignore")
+        writer.writerows(rows)
+        return output.getvalue().encode("utf-8")
+
+    def __flush(self, f, buffer: bytearray, export: dict, next_page: int):
+        if buffer:
+            #  Every flush is its own gzip member, concatenated members are still a valid gzip file.
+            f.write(gzip.compress(bytes(buffer)) if self.compress else buffer)
+            f.flush()
+            os.fsync(f.fileno())
+            buffer.clear()
+
+        self.__save_progress(export, next_page, f.tell())
+
+    def __load_progress(self, export: dict):
+        if not os.path.exists(self.progress_path) or not os.path.exists(self.path):
+            return None
+
+        with open(self.progress_path, "r") as f:
+            progress = json.load(f)
+
+        #  Only resume an export of the same pages of the same ladder, written the same way.
+        if progress.get("export") != export:
+            return None
+        return progress
+
+    def __save_progress(self, export: dict, next_page: int, offset: int):
+        progress = {"export": export, "next_page": next_page, "offset": offset}
+
+        #  Write to a temporary file first so a crash can never leave a half written progress file.
+        temp_path = f"{self.progress_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(progress, f)
+        os.replace(temp_path, self.progress_path)
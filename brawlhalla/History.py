@@ -0,0 +1,368 @@
+import heapq
+import mmap
+import os
+import struct
+import time
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from brawlhalla.API import Response
+
+"""
+This module contains the :class:`PlayerHistory`, a local store of players' ranked stats over time.
+"""
+
+#  timestamp, brawlhalla_id, legend_id (0 for the player's overall stats), rating, peak_rating, games, wins
+RECORD = struct.Struct("<dqHiiii")
+OVERALL = 0
+
+#  An index segment is this header (first record, number of records) followed by three columns of that many values,
+#  sorted by player and legend: the key (brawlhalla_id << 16 | legend_id), the timestamp and the record position.
+SEGMENT_HEADER = struct.Struct("<QQ")
+COLUMN_SIZE = 8
+MAX_SEGMENTS = 16
+
+#  The index keys must fit in 64 bits.
+MAX_BRAWLHALLA_ID = (1 << 48) - 1
+MAX_LEGEND_ID = (1 << 16) - 1
+
+
+class PlayerHistory:
+    """
+    An append-only, on-disk time series of players' ranked ``rating``, ``peak_rating``, ``games`` and ``wins``, fed by
+    the responses of :func:`BrawlhallaClient.get_player_ranked_stats` and :func:`BrawlhallaClient.get_ranked_page`.
+    A record is only written when one of those values changed since the last record of the same player (and legend),
+    so repeatedly recording unchanged players costs nothing. For example::
+
+        history = PlayerHistory("history.bin")
+        history.record_ranked_stats(await client.get_player_ranked_stats(1297647))
+        ratings = [entry.rating for entry in history.get_history(1297647)]
+        history.close()
+
+    path : str
+        The file to store the history in, it is created if it doesn't exist. The index is stored in
+        ``{path}.index``.
+
+    segment_size : int
+        The maximum number of records kept in memory before they are added to the index, default value is 65536.
+
+    .. note::
+        Both the records and the index are memory mapped. The index is made of segments sorted by player, so looking up
+        a player is a binary search in each segment. New records are indexed in memory until there are
+        ``segment_size`` of them or :func:`close` is called, then written as a new segment, and segments are merged
+        once there are more than 16 of them. Opening the store only reads the records that weren't indexed yet, so
+        always :func:`close` it when you are done.
+
+    .. note::
+        Records of a player (and legend) must be added in chronological order, :class:`ValueError` is raised
+        otherwise.
+    """
+
+    def __init__(self, path: str, segment_size: int = 1 << 16):
+        self.path = path
+        self.index_path = f"{path}.index"
+        self.segment_size = segment_size
+
+        self.__file = open(path, "ab+")
+        self.__index_file = open(self.index_path, "ab+")
+
+        #  Drop a partially written record left by a crash.
+        size = os.fstat(self.__file.fileno()).st_size
+        if size % RECORD.size:
+            self.__file.truncate(size - size % RECORD.size)
+
+        self.__map = None
+        self.__record_count = 0  # Records covered by the memory map
+        self.__index_map = None
+        self.__views = []  # Every memoryview of the index map, they must be released before it can be closed
+        self.__segments = []  # (keys, timestamps, positions) columns of each segment, oldest first
+        self.__indexed_records = 0  # Records covered by the segments
+        self.__tail = {}  # (brawlhalla_id, legend_id) -> [timestamps, positions, values] of records not indexed yet
+
+        self.__remap()
+        self.__total_records = self.__record_count
+        self.__remap_index()
+
+        #  A crash can leave the index ahead of the records, start it over in that case.
+        if self.__indexed_records > self.__total_records:
+            self.__truncate_index(0)
+
+        for position in range(self.__indexed_records, self.__total_records):
+            timestamp, brawlhalla_id, legend_id, *values = RECORD.unpack_from(self.__map, position * RECORD.size)
+            self.__index_tail((brawlhalla_id, legend_id), timestamp, position, tuple(values))
+            if position + 1 - self.__indexed_records >= self.segment_size:
+                self.__write_segment()
+
+    def close(self):
+        """
+        Indexes the records that aren't yet, and closes the store.
+        """
+        if self.__file.closed:
+            return
+
+        if self.__tail:
+            self.__write_segment()
+
+        self.__release_index()
+        if self.__map:
+            self.__map.close()
+        self.__index_file.close()
+        self.__file.close()
+
+    def record_ranked_stats(self, response: Response, timestamp: datetime = None) -> int:
+        """
+        Records a response from :func:`BrawlhallaClient.get_player_ranked_stats`, both the player's overall stats
+        and the stats of each of their legends.
+
+        :param API.Response response:
+            The response to record, ``None`` is ignored.
+        :param datetime timestamp:
+            The (optional) time the response was requested at, default value is now.
+        :return:
+            The number of records written, i.e. the number of values that changed.
+        :raises ValueError:
+            if ``timestamp`` is older than the last record of the player or one of their legends, or an ID is out of
+            range (``brawlhalla_id`` must fit in 48 bits and ``legend_id`` in 16 bits). Nothing is written in that case.
+        """
+        if response is None:
+            return 0
+
+        entries = [(response.brawlhalla_id, OVERALL, response)]
+        entries.extend((response.brawlhalla_id, legend.legend_id, legend) for legend in response.legends)
+        return self.__record(self.__resolve_timestamp(timestamp), entries)
+
+    def record_ranked_page(self, responses: Response, timestamp: datetime = None) -> int:
+        """
+        Records the overall stats of every player in a response from :func:`BrawlhallaClient.get_ranked_page`.
+        Entries without a ``brawlhalla_id`` (2v2 teams) are skipped.
+
+        :param API.Response responses:
+            The response to record, ``None`` is ignored.
+        :param datetime timestamp:
+            The (optional) time the response was requested at, default value is now.
+        :return:
+            The number of records written, i.e. the number of players whose values changed.
+        :raises ValueError:
+            if ``timestamp`` is older than the last record of one of the players, or a ``brawlhalla_id`` doesn't fit in
+            48 bits. Nothing is written in that case.
+        """
+        if responses is None:
+            return 0
+
+        entries = [(response.brawlhalla_id, OVERALL, response) for response in responses.responses
+                   if hasattr(response, "brawlhalla_id")]
+        return self.__record(self.__resolve_timestamp(timestamp), entries)
+
+    def get_history(self, brawlhalla_id: int, legend_id: int = None, start: datetime = None,
+                    end: datetime = None) -> list:
+        """
+        Gets the recorded history of a player.
+
+        :param int brawlhalla_id:
+            The Brawlhalla ID of the player.
+        :param int legend_id:
+            The (optional) ID of the legend to get the history of. If None, the player's overall history is returned.
+        :param datetime start:
+            The (optional) earliest time to return records for, inclusive.
+        :param datetime end:
+            The (optional) latest time to return records for, inclusive.
+        :return:
+            A ``list`` of :class:`API.Response` objects in chronological order, each with the following attributes:
+            ``timestamp`` (datetime), ``rating`` (int), ``peak_rating`` (int), ``games`` (int), and ``wins`` (int).
+            Only the times at which a value changed are returned.
+        """
+        key = (brawlhalla_id, legend_id or OVERALL)
+        start = start.timestamp() if start else float("-inf")
+        end = end.timestamp() if end else float("inf")
+
+        #  Segments are in chronological order, and so are the records of a player within a segment.
+        positions = []
+        for keys, timestamps, segment_positions in self.__segments:
+            first, last = self.__find(keys, key)
+            first = bisect_left(timestamps, start, first, last)
+            last = bisect_right(timestamps, end, first, last)
+            positions.extend(segment_positions[first:last])
+
+        if key in self.__tail:
+            timestamps, tail_positions, _ = self.__tail[key]
+            positions.extend(tail_positions[bisect_left(timestamps, start):bisect_right(timestamps, end)])
+
+        #  Records written since the file was mapped have to be mapped before they can be read.
+        if positions and positions[-1] >= self.__record_count:
+            self.__remap()
+
+        history = []
+        for position in positions:
+            timestamp, _, _, rating, peak_rating, games, wins = RECORD.unpack_from(self.__map,
+                                                                                    position * RECORD.size)
+            history.append(Response({"timestamp": datetime.fromtimestamp(timestamp), "rating": rating,
+                                     "peak_rating": peak_rating, "games": games, "wins": wins}))
+        return history
+
+    def __record(self, timestamp: float, entries: list) -> int:
+        #  Check (and pack) every entry before writing any of them, so a rejected response leaves the store unchanged.
+        records = []
+        for brawlhalla_id, legend_id, response in entries:
+            key = (brawlhalla_id, legend_id)
+            if not 0 <= brawlhalla_id <= MAX_BRAWLHALLA_ID or not 0 <= legend_id <= MAX_LEGEND_ID:
+                raise ValueError(f"Invalid brawlhalla_id or legend_id: {key}.")
+
+            last = self.__last_record(key)
+            if last and timestamp < last[0]:
+                raise ValueError(f"Records of {key} must be added in chronological order, "
+                                 f"{timestamp} is older than {last[0]}.")
+
+            values = (response.rating, response.peak_rating, response.games, response.wins)
+            records.append((key, values, RECORD.pack(timestamp, brawlhalla_id, legend_id, *values)))
+
+        written = 0
+        for key, values, record in records:
+            last = self.__last_record(key)
+            if last and last[1] == values:
+                continue
+
+            self.__file.write(record)
+            self.__index_tail(key, timestamp, self.__total_records, values)
+            self.__total_records += 1
+            written += 1
+
+            if self.__total_records - self.__indexed_records >= self.segment_size:
+                self.__write_segment()
+
+        self.__file.flush()
+        return written
+
+    def __last_record(self, key: tuple):
+        if key in self.__tail:
+            timestamps, _, values = self.__tail[key]
+            return timestamps[-1], values
+
+        for keys, timestamps, positions in reversed(self.__segments):
+            first, last = self.__find(keys, key)
+            if first < last:
+                timestamp, _, _, *values = RECORD.unpack_from(self.__map, positions[last - 1] * RECORD.size)
+                return timestamp, tuple(values)
+        return None
+
+    @staticmethod
+    def __find(keys, key: tuple) -> tuple:
+        combined = key[0] << 16 | key[1]
+        first = bisect_left(keys, combined)
+        return first, bisect_right(keys, combined, first)
+
+    def __index_tail(self, key: tuple, timestamp: float, position: int, values: tuple):
+        if key not in self.__tail:
+            self.__tail[key] = [array("d"), array("Q"), values]
+
+        entry = self.__tail[key]
+        entry[0].append(timestamp)
+        entry[1].append(position)
+        entry[2] = values
+
+    def __write_segment(self):
+        keys, timestamps, positions = array("Q"), array("d"), array("Q")
+        for key in sorted(self.__tail):
+            key_timestamps, key_positions, _ = self.__tail[key]
+            keys.extend([key[0] << 16 | key[1]] * len(key_positions))
+            timestamps.extend(key_timestamps)
+            positions.extend(key_positions)
+
+        #  The records must be on disk before the index points to them.
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+        self.__index_file.write(SEGMENT_HEADER.pack(self.__indexed_records, len(keys)))
+        self.__index_file.write(keys.tobytes() + timestamps.tobytes() + positions.tobytes())
+        self.__index_file.flush()
+        os.fsync(self.__index_file.fileno())
+
+        self.__tail.clear()
+        self.__remap()
+        self.__remap_index()
+
+        if len(self.__segments) > MAX_SEGMENTS:
+            self.__merge_segments()
+
+    def __merge_segments(self):
+        #  Ordering by position as well keeps the records of each player in chronological order.
+        merged = heapq.merge(*[zip(keys, positions, timestamps) for keys, timestamps, positions in self.__segments])
+        keys, timestamps, positions = array("Q"), array("d"), array("Q")
+        for key, position, timestamp in merged:
+            keys.append(key)
+            timestamps.append(timestamp)
+            positions.append(position)
+
+        #  Write the merged index next to the current one, and only replace it once it is complete.
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SEGMENT_HEADER.pack(0, len(keys)))
+            f.write(keys.tobytes() + timestamps.tobytes() + positions.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.__release_index()
+        self.__index_file.close()
+        os.replace(temp_path, self.index_path)
+        self.__index_file = open(self.index_path, "ab+")
+        self.__remap_index()
+
+    def __remap(self):
+        self.__file.flush()
+        size = os.fstat(self.__file.fileno()).st_size
+        if self.__map:
+            self.__map.close()
+
+        #  An empty file can't be memory mapped.
+        self.__map = mmap.mmap(self.__file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        self.__record_count = size // RECORD.size
+
+    def __remap_index(self):
+        self.__release_index()
+        size = os.fstat(self.__index_file.fileno()).st_size
+        if not size:
+            return
+
+        self.__index_map = mmap.mmap(self.__index_file.fileno(), size, access=mmap.ACCESS_READ)
+        view = memoryview(self.__index_map)
+        self.__views.append(view)
+
+        offset = 0
+        while offset + SEGMENT_HEADER.size <= size:
+            first_record, count = SEGMENT_HEADER.unpack_from(self.__index_map, offset)
+            start = offset + SEGMENT_HEADER.size
+            end = start + 3 * COLUMN_SIZE * count
+            #  A segment that was only partially written by a crash, or doesn't follow the previous one.
+            if end > size or first_record != self.__indexed_records:
+                break
+
+            columns = [view[start + i * COLUMN_SIZE * count:start + (i + 1) * COLUMN_SIZE * count]
+                       for i in range(3)]
+            segment = (columns[0].cast("Q"), columns[1].cast("d"), columns[2].cast("Q"))
+            self.__views.extend(columns + list(segment))
+            self.__segments.append(segment)
+            self.__indexed_records += count
+            offset = end
+
+        if offset < size:
+            self.__truncate_index(offset)
+
+    def __truncate_index(self, size: int):
+        self.__release_index()
+        self.__index_file.truncate(size)
+        self.__remap_index()
+
+    def __release_index(self):
+        for view in reversed(self.__views):
+            view.release()
+        self.__views = []
+        self.__segments = []
+        self.__indexed_records = 0
+
+        if self.__index_map:
+            self.__index_map.close()
+            self.__index_map = None
+
+    @staticmethod
+    def __resolve_timestamp(timestamp: datetime) -> float:
+        return timestamp.timestamp() if timestamp else time.time()
@@ -13,8 +13,7 @@ class RateBucket:
         self.__allowed_requests_per_15_minutes = requests_per_15_minutes
         self.__allowed_requests_per_second = requests_per_second
 
-        self.__last_check_time = time.time()
-        self.__elapsed_time = 0
+        self.__last_check_time = time.monotonic()
 
     def can_request(self):
         self.__add_requests()
@@ -25,35 +24,58 @@ class RateBucket:
             return False
 
     def get_next_request(self):
+        """
+        Returns the amount of time (in seconds) until a request can be made, 0 if one can be made right now. Requests
+        that have been reserved with :func:`reserve_request` but not yet sent are taken into account.
+        """
         if self.can_request():
             return 0
-        else:
-            #  We return the maximum duration to be sure we don't hit the ratelimit
-            if self.__allowed_requests_per_15_minutes < 1:
-                return 5
-            elif self.__allowed_requests_per_second < 1:
-                return 1
-        raise Exception("Request should be allowed.")  # This should never be reached
+
+        return max(self.__time_until_available(self.__allowed_requests_per_15_minutes,
+                                               self.requests_per_15_minutes / 900),
+                   self.__time_until_available(self.__allowed_requests_per_second, self.requests_per_second))
 
     def do_request(self):
         self.__allowed_requests_per_15_minutes -= 1
         self.__allowed_requests_per_second -= 1
 
+    def reserve_request(self):
+        """
+        Takes a token for a request, even if none is currently available, and returns the amount of time (in seconds)
+        the caller has to wait before sending it. Callers that reserve later are queued behind earlier reservations.
+        If the request ends up not being sent, the token should be given back with :func:`refund_request`.
+        """
+        delay = self.get_next_request()
+        self.do_request()
+        return delay
+
+    def refund_request(self):
+        """
+        Gives back a token taken by :func:`do_request` or :func:`reserve_request` for a request that was never sent.
+        """
+        self.__allowed_requests_per_15_minutes += 1
+        self.__allowed_requests_per_second += 1
+        self.__clamp()
+
+    @staticmethod
+    def __time_until_available(allowed, rate):
+        if allowed >= 1:
+            return 0
+        return (1 - allowed) / rate
+
     def __add_requests(self):
-        current_time = time.time()
-        self.__elapsed_time += current_time - self.__last_check_time
+        current_time = time.monotonic()
+        elapsed_time = current_time - self.__last_check_time
         self.__last_check_time = current_time
 
-        if self.__elapsed_time > 1:
-            elapsed_seconds = int(self.__elapsed_time)
-            self.__elapsed_time -= elapsed_seconds
-
-            #  Add up new requests that we can make since the last time we've checked
-            self.__allowed_requests_per_15_minutes += (1 / 900) * elapsed_seconds * self.requests_per_15_minutes
-            self.__allowed_requests_per_second += elapsed_seconds * self.requests_per_second
+        #  Add up new requests that we can make since the last time we've checked
+        self.__allowed_requests_per_15_minutes += (1 / 900) * elapsed_time * self.requests_per_15_minutes
+        self.__allowed_requests_per_second += elapsed_time * self.requests_per_second
+        self.__clamp()
 
-            # We can't have more than the max number of requests
-            if self.__allowed_requests_per_15_minutes > self.requests_per_15_minutes:
-                self.__allowed_requests_per_15_minutes = self.requests_per_15_minutes
-            if self.__allowed_requests_per_second > self.requests_per_second:
-                self.__allowed_requests_per_second = self.requests_per_second
+    def __clamp(self):
+        # We can't have more than the max number of requests
+        if self.__allowed_requests_per_15_minutes > self.requests_per_15_minutes:
+            self.__allowed_requests_per_15_minutes = self.requests_per_15_minutes
+        if self.__allowed_requests_per_second > self.requests_per_second:
+            self.__allowed_requests_per_second = self.requests_per_second
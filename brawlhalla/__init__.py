@@ -1,3 +1,5 @@
-from brawlhalla.BrawlhallaClient import BrawlhallaClient, ClientOptions
+from brawlhalla.BrawlhallaClient import BrawlhallaClient, BrawlhallaClientPool, ClientOptions
 from brawlhalla.RateBucket import RateBucket
 from brawlhalla.API import Legends, Response, BrawlhallaPyException
+from brawlhalla.Export import LadderExporter
+from brawlhalla.History import PlayerHistory
@@ -0,0 +1,67 @@
+import pickle
+import unittest
+
+from brawlhalla import Response
+from brawlhalla.API import _compact
+
+
+def player_stats():
+    return {"brawlhalla_id": 2, "name": "bmg | dan", "games": 10,
+            "legends": [{"legend_id": 3, "legend_name_key": "bodvar", "damagedealt": 120},
+                        {"legend_id": 4, "legend_name_key": "cassidy", "damagedealt": 80}],
+            "clan": {"clan_name": "clan", "clan_xp": 5}}
+
+
+class CompactResponseTests(unittest.TestCase):
+    def assertSameResponse(self, first, second):
+        self.assertEqual(type(first), Response)
+        self.assertEqual(type(second), Response)
+        for key in set(vars(first)) | set(vars(second)):
+            first_value, second_value = first[key], second[key]
+            if type(first_value) is list:
+                self.assertEqual(len(first_value), len(second_value))
+                for first_item, second_item in zip(first_value, second_value):
+                    self.assertSameResponse(first_item, second_item)
+            else:
+                self.assertEqual(first_value, second_value)
+
+    def test_object(self):
+        response = Response._from_compact(pickle.loads(pickle.dumps(_compact(player_stats()))))
+        self.assertSameResponse(response, Response(player_stats()))
+        self.assertEqual(response.legends[1].legend_name_key, "cassidy")
+
+    def test_array(self):
+        data = [{"rank": 1, "name": "one"}, {"rank": 2, "name": "two", "teamname": "a+b"}]
+        response = Response._from_compact(_compact([dict(x) for x in data]))
+        self.assertSameResponse(response, Response([dict(x) for x in data]))
+        self.assertEqual(response.responses[1].teamname, "a+b")
+
+    def test_lists_are_expanded_on_access(self):
+        data = {"brawlhalla_id": 1, "2v2": [{"teamname": "a+b", "region": "EU"}]}
+        response = Response._from_compact(_compact(data))
+        self.assertEqual(vars(response), {"brawlhalla_id": 1})
+        self.assertEqual(response["2v2"][0].region, "EU")
+        self.assertEqual(list(vars(response)), ["brawlhalla_id", "2v2"])
+
+    def test_pickle_before_expanding(self):
+        response = pickle.loads(pickle.dumps(Response._from_compact(_compact(player_stats()))))
+        self.assertEqual(vars(response), {"brawlhalla_id": 2, "name": "bmg | dan", "games": 10,
+                                          "clan": {"clan_name": "clan", "clan_xp": 5}})
+        self.assertSameResponse(response, Response(player_stats()))
+
+    def test_nested_lists(self):
+        data = {"clans": [{"clan_id": 1, "clan": [{"name": "one"}, {"name": "two"}]}, {"clan_id": 2, "clan": []}]}
+        response = Response._from_compact(_compact(data))
+        self.assertEqual([member.name for member in response.clans[0].clan], ["one", "two"])
+        self.assertEqual(response.clans[1].clan, [])
+
+    def test_missing_attribute(self):
+        response = Response._from_compact(_compact(player_stats()))
+        with self.assertRaises(AttributeError):
+            response.missing
+        with self.assertRaises(KeyError):
+            response["missing"]
+
+
+if __name__ == "__main__":
+    unittest.main()
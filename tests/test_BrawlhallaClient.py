@@ -0,0 +1,171 @@
+import asyncio
+import json
+import unittest
+
+import aiohttp
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from brawlhalla import BrawlhallaClient, BrawlhallaClientPool, ClientOptions
+
+PLAYER_STATS = {"brawlhalla_id": 7, "name": "player", "damagebomb": "1", "damagemine": "2", "damagespikeball": "3",
+                "damagesidekick": "4", "clan": {"clan_name": "clan", "clan_id": 1, "clan_xp": "50"},
+                "legends": [dict({"legend_id": legend_id, "legend_name_key": "bodvar"},
+                                 **dict((key, str(legend_id * 10)) for key in
+                                        ["damagedealt", "damagetaken", "damageunarmed", "damagethrownitem",
+                                         "damageweaponone", "damageweapontwo", "damagegadgets"]))
+                            for legend_id in (3, 4)]}
+
+CLAN = {"clan_id": 1, "clan_name": "clan", "clan_create_date": 1600000000, "clan_xp": "50",
+        "clan": [{"brawlhalla_id": 7, "name": "player", "rank": "Leader", "join_date": 1600003600, "xp": 10}]}
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status = 200
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    """
+    Answers ``player/7/stats`` and ``clan/1`` with the payloads above, and anything else with invalid JSON.
+    """
+    def get(self, endpoint):
+        if "/player/7/stats/" in endpoint:
+            return FakeResponse(json.dumps(PLAYER_STATS).encode("utf-8"))
+        if "/clan/1/" in endpoint:
+            return FakeResponse(json.dumps(CLAN).encode("utf-8"))
+        return FakeResponse(b"<html>Bad Gateway</html>")
+
+
+class CountingExecutor(ProcessPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class DeadlineTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.session = aiohttp.ClientSession()
+
+        options = ClientOptions()
+        options.requests_per_second = 1
+        self.client = BrawlhallaClient("key", options, self.session)
+
+        #  Use up the only request of this second, the next one is a second away.
+        self.client.bucket.do_request()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+
+    async def test_fail_fast_when_deadline_cant_be_met(self):
+        self.assertIsNone(await self.client.get_player_from_steam_id(1, timeout=0.5))
+
+        #  No token was taken for the request that was never sent.
+        self.assertAlmostEqual(self.client.bucket.get_next_request(), 1, delta=0.05)
+
+    async def test_fail_fast_keeps_room_for_the_request(self):
+        self.assertIsNone(await self.client.get_player_from_steam_id(1, timeout=1.05))
+        self.assertAlmostEqual(self.client.bucket.get_next_request(), 1, delta=0.05)
+
+    async def test_cancelled_wait_refunds_token(self):
+        task = asyncio.ensure_future(self.client.get_player_from_steam_id(1))
+        await asyncio.sleep(0)
+        self.assertAlmostEqual(self.client.bucket.get_next_request(), 2, delta=0.05)
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertAlmostEqual(self.client.bucket.get_next_request(), 1, delta=0.05)
+
+
+class BrawlhallaClientPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        elevated_options = ClientOptions()
+        elevated_options.requests_per_second = 20
+        self.pool = BrawlhallaClientPool(["key", ("elevated key", elevated_options)])
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_per_key_options(self):
+        default, elevated = self.pool.clients
+        self.assertEqual((default.api_key, default.bucket.requests_per_second), ("key", 10))
+        self.assertEqual((elevated.api_key, elevated.bucket.requests_per_second), ("elevated key", 20))
+        self.assertIs(default.session, elevated.session)
+
+    async def test_routes_to_earliest_token(self):
+        default, elevated = self.pool.clients
+        for _ in range(10):
+            default.bucket.do_request()
+
+        for _ in range(5):
+            self.assertIs(self.pool._BrawlhallaClientPool__next_client(), elevated)
+
+    async def test_close(self):
+        await self.pool.close()
+        self.assertTrue(self.pool.session.closed)
+
+
+class ExecutorTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = CountingExecutor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def client(self, **options):
+        client_options = ClientOptions()
+        client_options.executor = self.executor
+        client_options.executor_batch_size = 2
+        for name, value in options.items():
+            setattr(client_options, name, value)
+        return BrawlhallaClient("key", client_options, FakeSession())
+
+    async def test_get_player_stats(self):
+        response = await self.client().get_player_stats(7)
+        self.assertEqual((response.name, response.damagebomb, response.clan["clan_xp"]), ("player", 1, 50))
+        self.assertEqual([(legend.legend_id, legend.damagedealt) for legend in response.legends], [(3, 30), (4, 40)])
+
+    async def test_get_clan(self):
+        response = await self.client().get_clan(1)
+        self.assertEqual(response.clan_create_date, datetime.fromtimestamp(1600000000))
+        self.assertEqual(response.clan[0].join_date, datetime.fromtimestamp(1600003600))
+
+    async def test_batches(self):
+        submitted = self.executor.submitted
+        responses = await asyncio.gather(*[self.client().get_player_stats(7) for _ in range(5)])
+        self.assertEqual([response.damagemine for response in responses], [2] * 5)
+
+        #  Each client sends its own batch, and so do requests of the same client.
+        client = self.client()
+        responses = await asyncio.gather(*[client.get_player_stats(7) for _ in range(5)])
+        self.assertEqual([response.damagemine for response in responses], [2] * 5)
+        self.assertEqual(self.executor.submitted - submitted, 5 + 3)
+
+    async def test_errors(self):
+        with self.assertRaises(ValueError):
+            await self.client().get_player_stats(8)
+        self.assertIsNone(await self.client(propagate_exceptions=False).get_player_stats(8))
+
+        #  A failed response doesn't fail the rest of its batch.
+        client = self.client(propagate_exceptions=False)
+        responses = await asyncio.gather(client.get_player_stats(8), client.get_player_stats(7))
+        self.assertEqual((responses[0], responses[1].damagemine), (None, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
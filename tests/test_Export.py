@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from brawlhalla import BrawlhallaPyException, LadderExporter, Response
+from brawlhalla.Export import RANKED_PAGE_FIELDS, RANKED_2V2_FIELDS
+
+
+class FakeClient:
+    """
+    Serves a 5 page ladder of 3 players per page, failing the pages in ``fail_pages``.
+    """
+    def __init__(self, fail_pages=(), exception=None):
+        self.fail_pages = fail_pages
+        self.exception = exception
+        self.requested_pages = []
+
+    async def get_ranked_page(self, bracket, region, page=1, name=None, timeout=None):
+        self.requested_pages.append(page)
+        if page in self.fail_pages:
+            if self.exception:
+                raise self.exception
+            return None
+        if page > 5:
+            return Response([])
+        if bracket == "2v2":
+            return Response([{"rank": i + 1, "teamname": f"player {i}+player {i + 1}", "brawlhalla_id_one": i,
+                              "brawlhalla_id_two": i + 1, "rating": 1500 + i}
+                             for i in range((page - 1) * 3, page * 3)])
+        return Response([{"rank": i + 1, "name": f"player {i}", "brawlhalla_id": i, "rating": 1500 + i}
+                         for i in range((page - 1) * 3, page * 3)])
+
+
+class LadderExporterTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "ladder")
+
+    def read_rows(self, file_format="ndjson", compress=False):
+        with (gzip.open if compress else open)(self.path, "rb") as f:
+            text = f.read().decode("utf-8")
+
+        if file_format == "ndjson":
+            return [json.loads(line) for line in text.splitlines()]
+        elif file_format == "csv":
+            return list(csv.DictReader(io.StringIO(text)))
+
+        rows = []
+        for line in text.splitlines():
+            columns = json.loads(line)
+            rows.extend(dict(zip(columns, values)) for values in zip(*columns.values()))
+        return rows
+
+    def read_ids(self, compress=False):
+        return [row["brawlhalla_id"] for row in self.read_rows(compress=compress)]
+
+    def test_export(self):
+        for file_format in LadderExporter.FORMATS:
+            for compress in (False, True):
+                exporter = LadderExporter(FakeClient(), self.path, file_format, compress, buffer_size=10)
+                self.assertTrue(asyncio.run(exporter.export("1v1", "US-E")))
+                self.assertFalse(os.path.exists(exporter.progress_path))
+
+                rows = self.read_rows(file_format, compress)
+                self.assertEqual(len(rows), 15)
+
+                #  CSV has no types, and fields missing from the response are empty.
+                expected = {"rank": 5, "name": "player 4", "brawlhalla_id": 4, "rating": 1504, "tier": None}
+                if file_format == "csv":
+                    expected = dict((field, "" if value is None else str(value)) for field, value in expected.items())
+                self.assertEqual(list(rows[4].keys()), RANKED_PAGE_FIELDS)
+                self.assertLessEqual(expected.items(), rows[4].items())
+
+    def test_export_2v2(self):
+        exporter = LadderExporter(FakeClient(), self.path, "csv")
+        self.assertTrue(asyncio.run(exporter.export("2v2", "US-E")))
+
+        rows = self.read_rows("csv")
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(list(rows[0].keys()), RANKED_2V2_FIELDS)
+        self.assertLessEqual({"rank": "1", "teamname": "player 0+player 1", "brawlhalla_id_one": "0",
+                              "brawlhalla_id_two": "1", "rating": "1500"}.items(), rows[0].items())
+
+    def test_resume_after_none(self):
+        exporter = LadderExporter(FakeClient(fail_pages=(3,)), self.path, compress=True)
+        self.assertFalse(asyncio.run(exporter.export("1v1", "US-E")))
+
+        exporter.client = FakeClient()
+        self.assertTrue(asyncio.run(exporter.export("1v1", "US-E")))
+        self.assertEqual(exporter.client.requested_pages, [3, 4, 5, 6])
+        self.assertEqual(self.read_ids(compress=True), list(range(15)))
+
+    def test_resume_after_exception(self):
+        exception = BrawlhallaPyException(503, "Service Unavailable", "No further details.")
+        exporter = LadderExporter(FakeClient(fail_pages=(4,), exception=exception), self.path)
+        with self.assertRaises(BrawlhallaPyException):
+            asyncio.run(exporter.export("1v1", "US-E"))
+
+        #  Pages 1 to 3 were still buffered, they must not be requested again.
+        exporter.client = FakeClient()
+        self.assertTrue(asyncio.run(exporter.export("1v1", "US-E")))
+        self.assertEqual(exporter.client.requested_pages, [4, 5, 6])
+        self.assertEqual(self.read_ids(), list(range(15)))
+
+    def test_no_resume_with_different_settings(self):
+        asyncio.run(LadderExporter(FakeClient(fail_pages=(3,)), self.path).export("1v1", "US-E"))
+
+        exporter = LadderExporter(FakeClient(), self.path, fields=["brawlhalla_id"])
+        self.assertTrue(asyncio.run(exporter.export("1v1", "US-E")))
+        self.assertEqual(exporter.client.requested_pages, [1, 2, 3, 4, 5, 6])
+
+        asyncio.run(LadderExporter(FakeClient(fail_pages=(3,)), self.path).export("1v1", "US-E"))
+
+        exporter = LadderExporter(FakeClient(), self.path)
+        self.assertTrue(asyncio.run(exporter.export("1v1", "US-E", last_page=4)))
+        self.assertEqual(exporter.client.requested_pages, [1, 2, 3, 4])
+        self.assertEqual(self.read_ids(), list(range(12)))
+
+
+if __name__ == "__main__":
+    unittest.main()
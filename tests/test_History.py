@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from datetime import datetime
+from brawlhalla import PlayerHistory, Response
+
+
+def ranked_stats(rating, games, legend_rating=None, brawlhalla_id=7, legend_id=3):
+    legend_rating = legend_rating or rating
+    return Response({"name": "player", "brawlhalla_id": brawlhalla_id, "rating": rating, "peak_rating": rating,
+                     "games": games, "wins": 0, "2v2": [],
+                     "legends": [{"legend_id": legend_id, "rating": legend_rating, "peak_rating": legend_rating,
+                                  "games": games, "wins": 0}]})
+
+
+def ranked_page(players, rating):
+    return Response([{"brawlhalla_id": brawlhalla_id, "rating": rating, "peak_rating": rating, "games": rating,
+                      "wins": 0} for brawlhalla_id in players] + [{"teamname": "a+b", "rating": rating}])
+
+
+def day(number):
+    return datetime(2026, 1, number)
+
+
+class PlayerHistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "history")
+
+    def open(self, segment_size=1 << 16):
+        history = PlayerHistory(self.path, segment_size)
+        self.addCleanup(history.close)
+        return history
+
+    def ratings(self, history, brawlhalla_id=7, legend_id=None, start=None, end=None):
+        return [(entry.timestamp.day, entry.rating) for entry in
+                history.get_history(brawlhalla_id, legend_id, start, end)]
+
+    def test_only_changes_are_recorded(self):
+        history = self.open()
+        self.assertEqual(history.get_history(7), [])
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1500, 1), day(1)), 2)
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1500, 1), day(2)), 0)
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1510, 2, 1500), day(3)), 2)
+        self.assertEqual(history.record_ranked_page(ranked_page([7, 8], 1520), day(4)), 2)
+
+        self.assertEqual(self.ratings(history), [(1, 1500), (3, 1510), (4, 1520)])
+        self.assertEqual(self.ratings(history, legend_id=3), [(1, 1500), (3, 1500)])
+        self.assertEqual(self.ratings(history, start=day(2), end=day(3)), [(3, 1510)])
+        self.assertEqual(self.ratings(history, 8), [(4, 1520)])
+
+    def test_records_must_be_chronological(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.record_ranked_stats(ranked_stats(1510, 2), day(3))
+
+        with self.assertRaises(ValueError):
+            history.record_ranked_stats(ranked_stats(1490, 3), datetime(2025, 12, 27))
+        self.assertEqual(self.ratings(history, start=day(3)), [(3, 1510)])
+
+        #  Also checked against records that are already in the index.
+        history.close()
+        history = self.open()
+        with self.assertRaises(ValueError):
+            history.record_ranked_page(ranked_page([7], 1490), day(2))
+
+    def test_rejected_response_writes_nothing(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.record_ranked_stats(ranked_stats(1500, 1, 1600), day(3))
+
+        #  The overall stats would be in order, but the legend's are not.
+        with self.assertRaises(ValueError):
+            history.record_ranked_stats(ranked_stats(1510, 2), day(2))
+        self.assertEqual(self.ratings(history), [(1, 1500)])
+        self.assertEqual(self.ratings(history, legend_id=3), [(1, 1500), (3, 1600)])
+
+    def test_ids_out_of_range(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+
+        for brawlhalla_id in (-5, 1 << 48):
+            with self.assertRaises(ValueError):
+                history.record_ranked_page(ranked_page([8, brawlhalla_id], 1500), day(2))
+        with self.assertRaises(ValueError):
+            history.record_ranked_stats(ranked_stats(1510, 2, legend_id=1 << 16), day(2))
+        self.assertEqual(history.get_history(8), [])
+        self.assertEqual(self.ratings(history), [(1, 1500)])
+
+        #  The store can still be closed and reopened.
+        history.close()
+        self.assertEqual(self.ratings(self.open()), [(1, 1500)])
+
+    def test_reopen(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.close()
+
+        history = self.open()
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1500, 1), day(2)), 0)
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1510, 2), day(3)), 2)
+        self.assertEqual(self.ratings(history), [(1, 1500), (3, 1510)])
+
+    def test_segments_and_merges(self):
+        history = self.open(segment_size=3)
+        for number in range(1, 29):
+            history.record_ranked_page(ranked_page([1, 2, 3], 1000 + number), day(number))
+
+        #  28 pages of 3 records, more than 16 segments were merged at least once.
+        self.assertLessEqual(len(history._PlayerHistory__segments), 16)
+        expected = [(number, 1000 + number) for number in range(1, 29)]
+        self.assertEqual(self.ratings(history, 2), expected)
+        self.assertEqual(self.ratings(history, 3, start=day(27)), expected[-2:])
+
+        history.close()
+        self.assertEqual(self.ratings(self.open(segment_size=3), 2), expected)
+
+    def test_unindexed_records_are_read_on_open(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.close()
+
+        #  Records written without closing the store are not in the index.
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1510, 2), day(2))
+        history._PlayerHistory__file.flush()
+        self.assertEqual(self.ratings(self.open()), [(1, 1500), (2, 1510)])
+
+    def test_crash_recovery(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.close()
+
+        #  Partially written record and index segment.
+        with open(self.path, "ab") as f:
+            f.write(b"xx")
+        with open(f"{self.path}.index", "ab") as f:
+            f.write(b"\x02\x00\x00\x00\x00\x00\x00\x00\x05")
+
+        history = self.open()
+        self.assertEqual(self.ratings(history), [(1, 1500)])
+        self.assertEqual(history.record_ranked_stats(ranked_stats(1510, 2), day(2)), 2)
+        self.assertEqual(self.ratings(history), [(1, 1500), (2, 1510)])
+
+    def test_index_ahead_of_records(self):
+        history = self.open()
+        history.record_ranked_stats(ranked_stats(1500, 1), day(1))
+        history.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(0)
+
+        history = self.open()
+        self.assertEqual(history.get_history(7), [])
+        history.record_ranked_stats(ranked_stats(1510, 2), day(2))
+        self.assertEqual(self.ratings(history), [(2, 1510)])
+
+
+if __name__ == "__main__":
+    unittest.main()
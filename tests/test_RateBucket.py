@@ -0,0 +1,56 @@
+import time
+import unittest
+
+from unittest import mock
+from brawlhalla import RateBucket
+
+
+class RateBucketTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.bucket = RateBucket(180, 2)
+
+    def test_reservations_queue_behind_each_other(self):
+        delays = [self.bucket.reserve_request() for _ in range(5)]
+        self.assertEqual(delays, [0, 0, 0.5, 1.0, 1.5])
+
+    def test_refund_shortens_the_queue(self):
+        for _ in range(5):
+            self.bucket.reserve_request()
+        self.assertEqual(self.bucket.get_next_request(), 2.0)
+
+        self.bucket.refund_request()
+        self.assertEqual(self.bucket.get_next_request(), 1.5)
+
+    def test_refill_over_time(self):
+        self.bucket.do_request()
+        self.bucket.do_request()
+        self.assertFalse(self.bucket.can_request())
+
+        self.now += 0.5
+        self.assertTrue(self.bucket.can_request())
+
+    def test_15_minute_limit(self):
+        bucket = RateBucket(2, 10)
+        bucket.do_request()
+        bucket.do_request()
+
+        #  One request every 450 seconds.
+        self.assertEqual(bucket.get_next_request(), 450)
+
+    def test_refill_is_clamped(self):
+        self.now += 3600
+        self.assertEqual([self.bucket.reserve_request() for _ in range(3)], [0, 0, 0.5])
+
+    def test_refund_is_clamped(self):
+        self.bucket.refund_request()
+        self.bucket.refund_request()
+        self.assertEqual([self.bucket.reserve_request() for _ in range(3)], [0, 0, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()